@@ -0,0 +1,80 @@
+# fast_pack.pyx
+# cython: language_level=3, boundscheck=False, wraparound=False
+#
+# Extensão Cython (opcional) para o caminho mais usado do simulador:
+# modo Fixo com muitos registros. Faz em um laço C o mesmo que
+# 'simulator.pack_fixed_blocks': codifica as strings, empacota cada registro
+# de 163 bytes e já o posiciona dentro do seu bloco.
+#
+# Para compilar (gera fast_pack.*.so ao lado deste arquivo):
+#     pip install cython
+#     cythonize -i fast_pack.pyx
+# Sem a extensão compilada, o simulador usa a versão em Python/NumPy.
+
+from libc.string cimport memcpy, memset
+from cpython.unicode cimport PyUnicode_AsUTF8AndSize
+from student import Student
+
+def pack_fixed_blocks(dict cols, Py_ssize_t block_size):
+    """
+    Empacota todos os alunos (formato colunar) em blocos de 'block_size' bytes.
+    Cada bloco recebe o máximo de registros inteiros que couber, e o espaço
+    restante fica com padding (bytes nulos). Retorna as imagens dos blocos
+    concatenadas, idênticas às da versão em Python.
+    """
+    cdef Py_ssize_t widths[5]
+    widths[0] = Student.MAX_NOME
+    widths[1] = Student.CPF_LEN
+    widths[2] = Student.MAX_CURSO
+    widths[3] = Student.MAX_MAE
+    widths[4] = Student.MAX_PAI
+
+    cdef Py_ssize_t record_size = 12 + widths[0] + widths[1] + widths[2] + widths[3] + widths[4]
+    cdef Py_ssize_t per_block = block_size // record_size
+    cdef list matriculas = cols['matricula']
+    cdef list anos = cols['ano']
+    cdef list cas = cols['ca']
+    cdef list strings = [cols['nome'], cols['cpf'], cols['curso'], cols['mae'], cols['pai']]
+    cdef Py_ssize_t n = len(matriculas)
+
+    # O laço abaixo lê as listas sem checar os índices (boundscheck=False),
+    # então todas as colunas precisam ter exatamente n alunos.
+    for field in Student.FIELDS:
+        if len(cols[field]) != n:
+            raise ValueError(f"Coluna '{field}' tem {len(cols[field])} alunos, esperado {n}.")
+
+    if per_block == 0 or n == 0:
+        return bytearray()
+
+    # bytearray(tamanho) já nasce zerado: o padding de bloco sai de graça
+    cdef Py_ssize_t n_blocks = (n + per_block - 1) // per_block
+    out = bytearray(n_blocks * block_size)
+    cdef unsigned char[::1] view = out
+    cdef unsigned char* base = &view[0]
+
+    cdef unsigned char* p
+    cdef const char* text
+    cdef Py_ssize_t length, i, f
+    cdef int matricula, ano
+    cdef float ca
+    for i in range(n):
+        p = base + (i // per_block) * block_size + (i % per_block) * record_size
+
+        # Campos numéricos (int, int, float) = 12 bytes
+        matricula = matriculas[i]
+        ano = anos[i]
+        ca = cas[i]
+        memcpy(p, &matricula, 4)
+        memcpy(p + 4, &ano, 4)
+        memcpy(p + 8, &ca, 4)
+        p += 12
+
+        # Strings em utf-8, limitadas ao tamanho do campo e completadas com '#'
+        for f in range(5):
+            text = PyUnicode_AsUTF8AndSize((<list>strings[f])[i], &length)
+            if length > widths[f]:
+                length = widths[f]
+            memcpy(p, text, length)
+            memset(p + length, ord('#'), widths[f] - length)
+            p += widths[f]
+    return out
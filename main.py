@@ -1,5 +1,6 @@
 # main.py
-from utils import generate_students
+import sys
+from utils import generate_students, stream_students_to_sim
 from simulator import StorageSimulator
 
 def main():
@@ -39,21 +40,28 @@ def main():
             print("Opção inválida.")
             return
 
+        # Com 'python main.py --stream', os alunos são gerados e escritos pedaço
+        # a pedaço: usa menos memória, mas é mais lento (geração em série).
+        stream = '--stream' in sys.argv[1:]
+
         print("\nIniciando simulação...")
         print(f"Parâmetros: {num_records} registros, {block_size} bytes/bloco, Modo: {desc}")
         
         # --- 2. Geração dos dados ---
-        print("Gerando dados fictícios...")
-        students = generate_students(num_records)
+        if not stream:
+            print("Gerando dados fictícios...")
+            students = generate_students(num_records)
         
         # --- 3. Simulação de escrita ---
-        print("Simulando escrita em blocos...")
+        print("Gerando e simulando escrita em blocos..." if stream else "Simulando escrita em blocos...")
         
-        # O 'with' garante que o arquivo (sim.file_handle) será
+        # O 'with' garante que o arquivo .DAT será
         # aberto e fechado corretamente, chamando __enter__ e __exit__.
-        with StorageSimulator(block_size, strategy, allow_spanning) as sim:
-            for student in students:
-                sim.write_record(student)
+        with StorageSimulator(block_size, strategy, allow_spanning, num_records) as sim:
+            if stream:
+                stream_students_to_sim(num_records, sim)
+            else:
+                sim.write_batch(students)
         
         # --- 4. Exibição dos resultados ---
         sim.print_report()
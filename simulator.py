@@ -1,19 +1,53 @@
 # simulator.py
 import struct
 import os
-from typing import List, Dict
+import array
+from functools import lru_cache
+from typing import Dict, List
+import numpy as np
 from student import Student
 
-# Tenta importar o matplotlib para o gráfico opcional
+# Tenta importar a extensão Cython (fast_pack.pyx) para o modo Fixo
 try:
-    import matplotlib.pyplot as plt
-    MATPLOTLIB_AVAILABLE = True
+    from fast_pack import pack_fixed_blocks as _pack_fixed_blocks_c
+    FAST_PACK_AVAILABLE = True
 except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+    FAST_PACK_AVAILABLE = False
+
+# Cabeçalho numérico pré-compilado (int, int, float) = 12 bytes.
+# Criar o Struct uma única vez evita reinterpretar o formato 'iif' a cada registro.
+_HEADER = struct.Struct('iif')
+_HEADER_SIZE = _HEADER.size
+
+# Registro de TAMANHO FIXO completo, também pré-compilado (163 bytes).
+# As strings são entregues ao Struct já completadas com '#' ('ljust'), e o
+# Struct trunca as que passam do tamanho do campo.
+_FIXED = struct.Struct(
+    f'iif{Student.MAX_NOME}s{Student.CPF_LEN}s{Student.MAX_CURSO}s{Student.MAX_MAE}s{Student.MAX_PAI}s'
+)
+
+# Layout de um registro de TAMANHO FIXO como dtype estruturado do NumPy.
+# A ordem e os tamanhos espelham exatamente o que 'pack_fixed' produz (163 bytes),
+# permitindo serializar todos os alunos de uma vez.
+_FIXED_DTYPE = np.dtype([
+    ('matricula', np.int32),
+    ('ano', np.int32),
+    ('ca', np.float32),
+    ('nome', f'S{Student.MAX_NOME}'),
+    ('cpf', f'S{Student.CPF_LEN}'),
+    ('curso', f'S{Student.MAX_CURSO}'),
+    ('mae', f'S{Student.MAX_MAE}'),
+    ('pai', f'S{Student.MAX_PAI}'),
+])
+_FIXED_SIZE = _FIXED.size
+
+# Campos de string do registro, na ordem em que são gravados
+_STRING_FIELDS = ('nome', 'cpf', 'curso', 'mae', 'pai')
 
 # ==============================================================================
 # --- SEÇÃO DE SERIALIZAÇÃO ---
-# Converte o objeto Student (RAM) em bytes (Disco)
+# Converte o objeto Student (RAM) em bytes (Disco).
+# As versões '_batch' recebem os alunos em formato colunar (ver Student.FIELDS).
 # ==============================================================================
 
 def pack_fixed(student: Student) -> bytes:
@@ -21,65 +55,258 @@ def pack_fixed(student: Student) -> bytes:
     Converte um registro de aluno em bytes usando a estratégia de TAMANHO FIXO.
     Todos os campos de string são preenchidos (padding) até o tamanho máximo.
     """
-    try:
-        # Empacota os campos numéricos de tamanho fixo (int, int, float)
-        # 'i' = 4 bytes, 'i' = 4 bytes, 'f' = 4 bytes. Total: 12 bytes
-        header = struct.pack('iif', student.matricula, student.ano, student.ca)
-        
-        # Codifica strings para utf-8, limita ao tamanho máximo,
-        # e aplica 'ljust' (Left Justify) com o caractere de preenchimento '#'.
-        nome_b = student.nome.encode('utf-8')[:Student.MAX_NOME].ljust(Student.MAX_NOME, b'#')
-        cpf_b = student.cpf.encode('utf-8')[:Student.CPF_LEN].ljust(Student.CPF_LEN, b'#')
-        curso_b = student.curso.encode('utf-8')[:Student.MAX_CURSO].ljust(Student.MAX_CURSO, b'#')
-        mae_b = student.mae.encode('utf-8')[:Student.MAX_MAE].ljust(Student.MAX_MAE, b'#')
-        pai_b = student.pai.encode('utf-8')[:Student.MAX_PAI].ljust(Student.MAX_PAI, b'#')
+    return pack_fixed_fields(student.matricula, student.nome, student.cpf, student.curso,
+                             student.mae, student.pai, student.ano, student.ca)
 
+def pack_fixed_fields(matricula: int, nome: str, cpf: str, curso: str,
+                      mae: str, pai: str, ano: int, ca: float) -> bytes:
+    """
+    Mesmo que 'pack_fixed', mas recebendo os campos soltos (na ordem de
+    Student.FIELDS), sem precisar de um objeto Student.
+    """
+    try:
+        # Campos numéricos: 'i' = 4 bytes, 'i' = 4 bytes, 'f' = 4 bytes (12 bytes),
+        # seguidos das strings completadas com '#' (o Struct trunca as maiores).
         # Tamanho total fixo: 12 + 50 + 11 + 30 + 30 + 30 = 163 bytes
-        return header + nome_b + cpf_b + curso_b + mae_b + pai_b
+        return _FIXED.pack(
+            matricula, ano, ca,
+            nome.encode('utf-8').ljust(Student.MAX_NOME, b'#'),
+            cpf.encode('utf-8').ljust(Student.CPF_LEN, b'#'),
+            curso.encode('utf-8').ljust(Student.MAX_CURSO, b'#'),
+            mae.encode('utf-8').ljust(Student.MAX_MAE, b'#'),
+            pai.encode('utf-8').ljust(Student.MAX_PAI, b'#')
+        )
     except Exception as e:
-        print(f"Erro ao empacotar (fixo) {student.matricula}: {e}")
+        print(f"Erro ao empacotar (fixo) {matricula}: {e}")
         return b''
 
+def pack_fixed_into(buffer: bytearray, offset: int, student: Student) -> bool:
+    """
+    Igual a 'pack_fixed', mas escreve o registro direto em 'buffer' a partir
+    de 'offset' (com 'pack_into'), sem criar um objeto bytes intermediário.
+    Retorna False se o registro não pôde ser empacotado.
+    """
+    return pack_fixed_fields_into(buffer, offset, student.matricula, student.nome, student.cpf,
+                                  student.curso, student.mae, student.pai, student.ano, student.ca)
+
+def pack_fixed_fields_into(buffer: bytearray, offset: int, matricula: int, nome: str, cpf: str,
+                           curso: str, mae: str, pai: str, ano: int, ca: float) -> bool:
+    """Mesmo que 'pack_fixed_into', mas recebendo os campos soltos."""
+    try:
+        _FIXED.pack_into(
+            buffer, offset,
+            matricula, ano, ca,
+            nome.encode('utf-8').ljust(Student.MAX_NOME, b'#'),
+            cpf.encode('utf-8').ljust(Student.CPF_LEN, b'#'),
+            curso.encode('utf-8').ljust(Student.MAX_CURSO, b'#'),
+            mae.encode('utf-8').ljust(Student.MAX_MAE, b'#'),
+            pai.encode('utf-8').ljust(Student.MAX_PAI, b'#')
+        )
+        return True
+    except Exception as e:
+        print(f"Erro ao empacotar (fixo) {matricula}: {e}")
+        return False
+
+# Erros que 'pack_fixed' trata como "registro não pôde ser empacotado"
+_PACK_ERRORS = (struct.error, OverflowError, TypeError, AttributeError, UnicodeEncodeError)
+
+# Número (aproximado) de registros preenchidos por vez em 'pack_fixed_blocks'
+_FILL_RECORDS = 16384
+
+def _fill_fixed(records: np.ndarray, cols: Dict[str, list]):
+    """
+    Preenche 'records' (array com o dtype '_FIXED_DTYPE', de qualquer formato)
+    com os alunos em formato colunar, na ordem das linhas.
+    """
+    for field in Student.FIELDS:
+        values = cols[field]
+        if field in _STRING_FIELDS:
+            # Cada string já vai completada com '#', como em 'pack_fixed';
+            # o NumPy trunca as que passam do tamanho do campo.
+            width = records.dtype[field].itemsize
+            values = [text.encode('utf-8').ljust(width, b'#') for text in values]
+        records[field] = np.asarray(values, dtype=records.dtype[field]).reshape(records.shape)
+
+def pack_fixed_batch(cols: Dict[str, list]) -> np.ndarray:
+    """
+    Versão vetorizada de 'pack_fixed': converte TODOS os alunos de uma vez.
+    Retorna um array de bytes (uint8) com um registro de 163 bytes por aluno,
+    idêntico à concatenação de 'pack_fixed' para cada aluno.
+    """
+    records = np.empty(len(cols['matricula']), dtype=_FIXED_DTYPE)
+    _fill_fixed(records, cols)
+    return records.view(np.uint8) # Visão em bytes do mesmo array (sem cópia)
+
+def pack_fixed_blocks(cols: Dict[str, list], block_size: int) -> np.ndarray:
+    """
+    Empacota todos os alunos (formato colunar) já distribuídos em blocos de
+    'block_size' bytes: cada bloco recebe o máximo de registros inteiros que
+    couber, e o espaço restante fica com padding (bytes nulos).
+    O último bloco pode ter menos registros. Quando a extensão Cython
+    'fast_pack' está compilada, ela substitui esta função.
+    """
+    n = len(cols['matricula'])
+    per_block = block_size // _FIXED_SIZE
+    if per_block == 0 or n == 0:
+        return np.empty(0, dtype=np.uint8)
+
+    # Como todos os registros têm o mesmo tamanho, a posição de cada um é
+    # pura aritmética. Os registros são gravados direto nos blocos, através
+    # de visões de 'out' onde cada linha é um bloco e cada coluna um registro.
+    full_blocks, rest = divmod(n, per_block)
+    out = np.zeros((full_blocks + (1 if rest else 0)) * block_size, dtype=np.uint8)
+    split = full_blocks * per_block
+    if full_blocks:
+        records = np.ndarray((full_blocks, per_block), dtype=_FIXED_DTYPE, buffer=out,
+                             strides=(block_size, _FIXED_SIZE))
+        # Preenche alguns blocos por vez, para que as listas e arrays
+        # temporários de cada campo não cresçam com o lote inteiro.
+        step = max(1, _FILL_RECORDS // per_block)
+        for start in range(0, full_blocks, step):
+            stop = min(start + step, full_blocks)
+            _fill_fixed(records[start:stop], _slice_columns(cols, start * per_block, stop * per_block))
+    if rest:
+        records = np.ndarray(rest, dtype=_FIXED_DTYPE, buffer=out, offset=full_blocks * block_size)
+        _fill_fixed(records, _slice_columns(cols, split, n))
+    return out
+
+if FAST_PACK_AVAILABLE:
+    pack_fixed_blocks = _pack_fixed_blocks_c
+
+def _slice_columns(cols: Dict[str, list], start: int, stop: int) -> Dict[str, list]:
+    """Recorta as linhas [start, stop) de todos os campos (formato colunar)."""
+    return {field: values[start:stop] for field, values in cols.items()}
+
+def _drop_unpackable(cols: Dict[str, list]) -> Dict[str, list]:
+    """
+    Remove os alunos (formato colunar) que 'pack_fixed_fields' não consegue
+    empacotar. Cada um é avisado com a mesma mensagem de 'write_record'.
+    """
+    rows = [row for row in zip(*(cols[field] for field in Student.FIELDS))
+            if pack_fixed_fields(*row)]
+    return {field: [row[i] for row in rows] for i, field in enumerate(Student.FIELDS)}
+
 def pack_variable(student: Student) -> bytes:
     """
     Converte um registro de aluno em bytes usando a estratégia de TAMANHO VARIÁVEL.
     Usa um caractere nulo (b'\0') como delimitador de fim de string.
     """
+    return pack_variable_fields(student.matricula, student.nome, student.cpf, student.curso,
+                                student.mae, student.pai, student.ano, student.ca)
+
+def pack_variable_fields(matricula: int, nome: str, cpf: str, curso: str,
+                         mae: str, pai: str, ano: int, ca: float) -> bytes:
+    """
+    Mesmo que 'pack_variable', mas recebendo os campos soltos (na ordem de
+    Student.FIELDS), sem precisar de um objeto Student.
+    """
     try:
         # Empacota os campos numéricos (12 bytes)
-        header = struct.pack('iif', student.matricula, student.ano, student.ca)
+        header = _HEADER.pack(matricula, ano, ca)
         
-        # Concatena todas as strings, cada uma terminada com b'\0'.
+        # Concatena o cabeçalho e todas as strings, cada uma seguida do b'\0',
+        # em um único 'join' (uma só alocação para o registro final).
         # O tamanho final do registro depende do conteúdo real dos dados.
-        strings_b = b''.join([
-            student.nome.encode('utf-8') + b'\0',
-            student.cpf.encode('utf-8') + b'\0',
-            student.curso.encode('utf-8') + b'\0',
-            student.mae.encode('utf-8') + b'\0',
-            student.pai.encode('utf-8') + b'\0'
-        ])
-        return header + strings_b
+        return b''.join((
+            header,
+            nome.encode('utf-8'), b'\0',
+            cpf.encode('utf-8'), b'\0',
+            curso.encode('utf-8'), b'\0',
+            mae.encode('utf-8'), b'\0',
+            pai.encode('utf-8'), b'\0'
+        ))
     except Exception as e:
-        print(f"Erro ao empacotar (variável) {student.matricula}: {e}")
+        print(f"Erro ao empacotar (variável) {matricula}: {e}")
         return b''
 
+def pack_variable_batch(cols: Dict[str, list]) -> List[bytes]:
+    """
+    Converte todos os alunos (formato colunar) com 'pack_variable_fields'.
+    Registros que falharem ao empacotar aparecem como b'' na lista.
+    """
+    rows = zip(*(cols[field] for field in Student.FIELDS))
+    return [pack_variable_fields(*row) for row in rows]
+
 def get_variable_size(student: Student) -> int:
     """
     Calcula o tamanho "útil" real de um registro, como se fosse 'variável'.
     Isso é usado para calcular a 'Eficiência de Armazenamento' no modo Fixo,
     comparando o espaço usado (163 bytes) vs o espaço que seria útil (ex: 80 bytes).
     """
+    return get_variable_size_fields(student.nome, student.cpf, student.curso, student.mae, student.pai)
+
+def get_variable_size_fields(nome: str, cpf: str, curso: str, mae: str, pai: str) -> int:
+    """Mesmo que 'get_variable_size', mas recebendo os campos de string soltos."""
     try:
-        size = struct.calcsize('iif') # 12 bytes
-        size += len(student.nome.encode('utf-8'))
-        size += len(student.cpf.encode('utf-8'))
-        size += len(student.curso.encode('utf-8'))
-        size += len(student.mae.encode('utf-8'))
-        size += len(student.pai.encode('utf-8'))
+        # Os 5 campos são medidos juntos, com uma única codificação utf-8
+        size = _HEADER_SIZE # 12 bytes
+        size += len(''.join((nome, cpf, curso, mae, pai)).encode('utf-8'))
         return size + 5 # +5 pelos 5 delimitadores b'\0'
     except Exception:
         return 0
 
+def get_variable_size_batch(cols: Dict[str, list]) -> int:
+    """Soma de 'get_variable_size' para todos os alunos (formato colunar)."""
+    n = len(cols['matricula'])
+    size = n * (_HEADER_SIZE + 5) # Cabeçalho + 5 delimitadores b'\0' por registro
+    for field in _STRING_FIELDS:
+        size += len(''.join(cols[field]).encode('utf-8'))
+    return size
+
+# ==============================================================================
+# --- KERNEL DE EMPACOTAMENTO EM BLOCOS ---
+# Mesma lógica de limites do modo Com Espalhamento de 'write_record', mas sobre
+# arrays de bytes, para ser compilada pelo numba quando disponível.
+# ==============================================================================
+
+def _pack_blocks(records, sizes, out, used, block_size, off, fill):
+    """
+    Distribui os registros (concatenados em 'records', com tamanhos em 'sizes')
+    em blocos consecutivos de 'out', dividindo-os entre blocos quando preciso,
+    e começando com 'off' bytes já ocupados no primeiro bloco.
+    Retorna (blocos completos, bytes usados no último bloco).
+    Com fill=False apenas conta os blocos, sem tocar em 'out' e 'used';
+    isso permite alocar 'out' com o tamanho exato antes da passada real.
+    """
+    block = 0 # Índice do bloco atual dentro de 'out'
+    pos = 0   # Posição de leitura em 'records'
+    for k in range(sizes.shape[0]):
+        # Preenche 100% do bloco atual antes de continuar no próximo
+        remaining = sizes[k]
+        while remaining > 0:
+            if off == block_size:
+                if fill:
+                    used[block] = off
+                block += 1
+                off = 0
+            chunk = min(remaining, block_size - off)
+            if fill:
+                start = block * block_size + off
+                out[start : start + chunk] = records[pos : pos + chunk]
+            off += chunk
+            pos += chunk
+            remaining -= chunk
+    return block, off
+
+# A partir de quantos registros vale a pena usar o kernel compilado. Importar o
+# numba e carregar o kernel (mesmo já em cache) leva ~0,3s; só no modo Com
+# Espalhamento, e a partir de ~1 milhão de registros, o laço compilado ganha
+# do código de 'write_record'. No modo Contíguo ele não chega a compensar.
+_NUMBA_MIN_RECORDS = 1000000
+
+@lru_cache(maxsize=None)
+def _jit_pack_blocks():
+    """
+    Retorna '_pack_blocks' compilado pelo numba, ou None se ele não estiver
+    instalado. A importação fica aqui (e não no topo do módulo) porque é lenta,
+    e só é necessária em lotes grandes do modo variável.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_pack_blocks)
+
 # ==============================================================================
 # --- CLASSE DO SIMULADOR ---
 # Gerencia a lógica de blocos e a escrita no arquivo .DAT
@@ -88,28 +315,56 @@ def get_variable_size(student: Student) -> int:
 class StorageSimulator:
     """Simula o armazenamento de registros em um arquivo .DAT dividido em blocos."""
     
-    def __init__(self, block_size: int, strategy: str, allow_spanning: bool):
+    def __init__(self, block_size: int, strategy: str, allow_spanning: bool, num_records: int = 0):
         self.block_size = block_size
         self.strategy = strategy          # 'fixed' ou 'variable'
         self.allow_spanning = allow_spanning  # True (Espalhado) ou False (Contíguo)
+        self.num_records = num_records    # Opcional: usado só para pré-alocar o arquivo
         
         self.output_file = 'alunos.dat'
         self.chart_file = 'ocupacao_blocos.png' 
-        self.file_handle = None
+        self._fd = None # Descritor de arquivo "cru" (os.open)
+        self._bytes_written = 0
         
-        # O 'bloco' atual mantido em memória (RAM)
-        self.current_block = bytearray()
+        # O 'bloco' atual mantido em memória (RAM).
+        # É alocado uma única vez com o tamanho do bloco e reaproveitado;
+        # '_off' indica quantos bytes do bloco atual já foram ocupados.
+        self._block = bytearray(block_size)
+        self._off = 0
+        # Bloco de zeros pré-alocado, usado como padding no '_flush_block'
+        self._zero_block = bytes(block_size)
+
+        # Buffer de escrita: acumula vários blocos "fechados" e só chama
+        # 'write' no arquivo quando atinge '_WRITE_FLUSH' bytes (1 MiB).
+        # Evita uma chamada de sistema por bloco quando o bloco é pequeno.
+        self._write_buf = bytearray()
+        self._WRITE_FLUSH = 1 << 20
         
         # --- Estatísticas ---
-        self.block_stats: List[Dict[str, int]] = [] # Lista para o relatório e gráfico
+        # Bytes usados em cada bloco, para o relatório e o gráfico.
+        # Como o total de todo bloco é sempre 'block_size', só o 'used' é guardado
+        # (4 bytes por bloco em vez de um dicionário inteiro).
+        self._used = array.array('i')
         self.total_useful_data = 0 # Acumulador para o cálculo de eficiência
 
     def __enter__(self):
         """
-        Abre o arquivo .DAT em modo 'wb' (write, binary).
-        'w' garante que o arquivo seja sobrescrito a cada nova simulação.
+        Abre o arquivo .DAT para escrita direta via 'os.open'/'os.write'.
+        O_TRUNC garante que o arquivo seja sobrescrito a cada nova simulação.
         """
-        self.file_handle = open(self.output_file, 'wb')
+        self._fd = os.open(self.output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._bytes_written = 0
+
+        # No modo Fixo o tamanho final do arquivo é previsível,
+        # então reservamos o espaço em disco de uma vez (quando o SO suporta).
+        estimated_size = self._estimate_file_size()
+        if estimated_size > 0 and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, estimated_size)
+            except OSError:
+                pass # Sistema de arquivos sem suporte: segue sem pré-alocar
+
+        self._compile()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -118,8 +373,12 @@ class StorageSimulator:
         Isso é chamado automaticamente ao sair do bloco 'with' em main.py.
         """
         self._flush_block() # Salva o último bloco (parcial)
-        if self.file_handle:
-            self.file_handle.close()
+        if self._fd is not None:
+            self._drain_write_buf() # Descarrega os blocos ainda no buffer
+            # Descarta a sobra da pré-alocação (ex: registros que falharam)
+            os.ftruncate(self._fd, self._bytes_written)
+            os.close(self._fd)
+            self._fd = None
         print(f"\nArquivo '{self.output_file}' gerado com sucesso.")
 
     def _flush_block(self):
@@ -127,115 +386,337 @@ class StorageSimulator:
         Escreve o bloco da memória (RAM) para o disco (Arquivo .DAT)
         e preenche o espaço restante com padding (bytes nulos).
         """
-        if not self.current_block:
+        if self._off == 0:
             return # Não faz nada se o bloco estiver vazio
 
-        used_bytes = len(self.current_block)
+        used_bytes = self._off
         
         # Calcula o 'padding' (preenchimento) de bloco.
         # Este é o espaço desperdiçado *dentro* do bloco.
         padding_size = self.block_size - used_bytes
-        if padding_size < 0:
-            padding_size = 0 # Segurança para o modo 'spanning'
             
-        self.current_block.extend(b'\0' * padding_size)
-        
-        # Escreve o bloco inteiro (dados + padding) no arquivo
-        self.file_handle.write(self.current_block)
+        # Acumula o bloco inteiro (dados + padding) no buffer de escrita.
+        # As fatias de memoryview evitam criar cópias temporárias.
+        self._write_buf.extend(memoryview(self._block)[:used_bytes])
+        self._write_buf.extend(memoryview(self._zero_block)[:padding_size])
+        if len(self._write_buf) >= self._WRITE_FLUSH:
+            self._drain_write_buf()
         
         # Salva as estatísticas deste bloco
-        self.block_stats.append({
-            'used': used_bytes,
-            'total': self.block_size
-        })
+        self._used.append(used_bytes)
         
-        # Reseta o bloco da memória para o próximo ciclo
-        self.current_block = bytearray()
+        # Reseta o bloco da memória para o próximo ciclo (sem realocar)
+        self._off = 0
 
-    def _get_record_data(self, student: Student) -> (bytes, int):
-        """Helper para selecionar a função de packing correta e calcular o tamanho útil."""
+    def _estimate_file_size(self) -> int:
+        """
+        Calcula o tamanho final do arquivo .DAT no modo Fixo
+        (número de blocos necessários * tamanho do bloco).
+        Retorna 0 quando o tamanho não é previsível.
+        """
+        if self.strategy != 'fixed' or self.num_records <= 0:
+            return 0
+        records_per_block = self.block_size // _FIXED_SIZE
+        if records_per_block == 0:
+            return 0 # Nenhum registro cabe no bloco
+        total_blocks = -(-self.num_records // records_per_block) # Divisão arredondada para cima
+        return total_blocks * self.block_size
+
+    def _drain_write_buf(self):
+        """Escreve no arquivo .DAT todos os blocos acumulados no buffer de escrita."""
+        if not self._write_buf:
+            return
+        with memoryview(self._write_buf) as view: # Liberada antes do 'clear'
+            self._write_all(view)
+        self._write_buf.clear()
+
+    def _write_all(self, data):
+        """
+        Escreve 'data' (qualquer objeto com buffer: bytes, memoryview, array)
+        direto no arquivo .DAT, sem passar pelo buffer de escrita.
+        """
+        # 'os.write' pode escrever apenas parte dos dados; repete até terminar.
+        # Os 'with' liberam as visões mesmo se a escrita falhar (ex: disco cheio),
+        # para que o buffer de origem continue podendo ser redimensionado.
+        with memoryview(data).cast('B') as view:
+            size = len(view)
+            written = 0
+            while written < size:
+                with view[written:] as chunk:
+                    written += os.write(self._fd, chunk)
+        self._bytes_written += size
+
+    def _compile(self):
+        """
+        Escolhe, uma única vez, a versão de 'write_record_from_fields' da
+        estratégia configurada. Assim cada registro não precisa passar pela
+        cadeia de if/elif de estratégia (o atributo da instância "esconde" o
+        método da classe).
+        """
         if self.strategy == 'fixed':
-            record_bytes = pack_fixed(student)
-            useful_size = get_variable_size(student)
-            return record_bytes, useful_size
+            if _FIXED_SIZE <= self.block_size:
+                self.write_record_from_fields = self._write_record_fixed
+            else:
+                self.write_record_from_fields = self._write_record_fixed_oversized
+        elif not self.allow_spanning:
+            self.write_record_from_fields = self._write_record_variable_contig
         else:
-            record_bytes = pack_variable(student)
-            useful_size = len(record_bytes) # No modo variável, todo o registro é útil
-            return record_bytes, useful_size
+            self.write_record_from_fields = self._write_record_variable_span
 
     def write_record(self, student: Student):
         """
         Coração da lógica do simulador. Organiza e escreve um registro
         conforme a estratégia de armazenamento escolhida.
         """
-        record_bytes, useful_size = self._get_record_data(student)
+        self.write_record_from_fields(student.matricula, student.nome, student.cpf, student.curso,
+                                      student.mae, student.pai, student.ano, student.ca)
+
+    def write_record_from_fields(self, matricula: int, nome: str, cpf: str, curso: str,
+                                 mae: str, pai: str, ano: int, ca: float):
+        """
+        Mesmo que 'write_record', mas recebendo os campos soltos (na ordem de
+        Student.FIELDS), para escrever alunos sem criar objetos Student.
+        Dentro do 'with', '_compile' já substituiu este método pela versão
+        da estratégia; fora dele, a escolha é feita na primeira chamada.
+        """
+        self._compile()
+        self.write_record_from_fields(matricula, nome, cpf, curso, mae, pai, ano, ca)
+
+    def _reject_oversized(self, matricula: int, record_size: int):
+        """Avisa que um registro maior que o bloco não pode ser escrito."""
+        print(f"Erro: Registro {matricula} ({record_size}b) é maior que o bloco ({self.block_size}b) e não pode ser escrito.")
+
+    # ======================================================
+    # --- LÓGICA DE ARMAZENAMENTO (Tratamento de Limites) ---
+    # ======================================================
+
+    def _write_record_fixed(self, matricula: int, nome: str, cpf: str, curso: str,
+                            mae: str, pai: str, ano: int, ca: float):
+        """--- Estratégia 1: Tamanho Fixo ---"""
+        # Se o registro (fixo de 163b) não cabe no espaço que sobrou,
+        # "fecha" (flusha) o bloco atual e inicia um novo. Fazer isso antes de
+        # empacotar não muda o resultado: o próximo registro fecharia o bloco igual.
+        off = self._off
+        if off + _FIXED_SIZE > self.block_size:
+            self._flush_block()
+            off = 0
+
+        # Empacota direto no bloco, sem bytes intermediários
+        if not pack_fixed_fields_into(self._block, off, matricula, nome, cpf, curso, mae, pai, ano, ca):
+            return # Falha ao empacotar
+
+        # Soma ao total de dados "reais" (sem padding)
+        self.total_useful_data += get_variable_size_fields(nome, cpf, curso, mae, pai)
+        self._off = off + _FIXED_SIZE
+
+    def _write_record_fixed_oversized(self, matricula: int, nome: str, cpf: str, curso: str,
+                                      mae: str, pai: str, ano: int, ca: float):
+        """Tamanho Fixo com bloco menor que o registro: nenhum registro pode ser escrito."""
+        if pack_fixed_fields(matricula, nome, cpf, curso, mae, pai, ano, ca):
+            self._reject_oversized(matricula, _FIXED_SIZE)
+
+    def _write_record_variable_contig(self, matricula: int, nome: str, cpf: str, curso: str,
+                                      mae: str, pai: str, ano: int, ca: float):
+        """--- Estratégia 2: Variável (Contíguo, Sem Espalhamento) ---"""
+        record_bytes = pack_variable_fields(matricula, nome, cpf, curso, mae, pai, ano, ca)
         record_size = len(record_bytes)
-        
         if record_size == 0:
             return # Falha ao empacotar
 
         # --- Validação de Tamanho (ANTES de contar) ---
-        # Impede que registros impossíveis (maiores que o bloco) sejam escritos
-        # ou contados, exceto no modo 'spanning'.
-        if (self.strategy == 'fixed' or not self.allow_spanning) and record_size > self.block_size:
-            print(f"Erro: Registro {student.matricula} ({record_size}b) é maior que o bloco ({self.block_size}b) e não pode ser escrito.")
+        block_size = self.block_size
+        if record_size > block_size:
+            self._reject_oversized(matricula, record_size)
             return
 
-        # Soma ao total de dados "reais" (sem padding)
-        self.total_useful_data += useful_size
+        # No modo variável, todo o registro é útil
+        self.total_useful_data += record_size
 
-        # ======================================================
-        # --- LÓGICA DE ARMAZENAMENTO (Tratamento de Limites) ---
-        # ======================================================
+        # Lógica idêntica ao Fixo: se não cabe, vai para o próximo.
+        # Isso gera a "Fragmentação Interna".
+        off = self._off
+        if off + record_size > block_size:
+            self._flush_block()
+            off = 0
+        self._block[off : off + record_size] = record_bytes
+        self._off = off + record_size
 
-        # --- Estratégia 1: Tamanho Fixo ---
-        if self.strategy == 'fixed':
-            # Se o registro (fixo de 163b) não cabe no espaço que sobrou,
-            # "fecha" (flusha) o bloco atual e inicia um novo.
-            if len(self.current_block) + record_size > self.block_size:
-                self._flush_block()
-            self.current_block.extend(record_bytes)
-
-        # --- Estratégia 2: Variável (Contíguo, Sem Espalhamento) ---
-        elif self.strategy == 'variable' and not self.allow_spanning:
-            # Lógica idêntica ao Fixo: se não cabe, vai para o próximo.
-            # A diferença é que 'record_size' é variável.
-            # Isso gera a "Fragmentação Interna".
-            if len(self.current_block) + record_size > self.block_size:
+    def _write_record_variable_span(self, matricula: int, nome: str, cpf: str, curso: str,
+                                    mae: str, pai: str, ano: int, ca: float):
+        """--- Estratégia 3: Variável (Com Espalhamento) ---"""
+        record_bytes = pack_variable_fields(matricula, nome, cpf, curso, mae, pai, ano, ca)
+        bytes_to_write = len(record_bytes)
+        if bytes_to_write == 0:
+            return # Falha ao empacotar
+
+        # No modo 'spanning' não há limite de tamanho: o registro é dividido.
+        self.total_useful_data += bytes_to_write
+
+        # Variáveis locais evitam buscar os atributos a cada volta do laço
+        block = self._block
+        block_size = self.block_size
+        off = self._off
+        record_offset = 0 # Controla qual parte do registro estamos lendo
+        # Fatiar uma memoryview não copia os bytes do registro
+        record_view = memoryview(record_bytes)
+        while bytes_to_write > 0:
+            if off == block_size:
+                # Se o bloco está 100% cheio, "fecha" e começa um novo
+                self._off = off
                 self._flush_block()
-            self.current_block.extend(record_bytes)
+                off = 0
 
-        # --- Estratégia 3: Variável (Com Espalhamento) ---
-        elif self.strategy == 'variable' and self.allow_spanning:
-            bytes_to_write = record_size
-            record_offset = 0 # Controla qual parte do registro estamos lendo
-            
-            while bytes_to_write > 0:
-                # Calcula o espaço livre no bloco atual
-                space_in_block = self.block_size - len(self.current_block)
-                
-                if space_in_block == 0:
-                    # Se o bloco está 100% cheio, "fecha" e começa um novo
-                    self._flush_block()
-                    space_in_block = self.block_size
-
-                # Calcula o pedaço (chunk) que cabe no bloco atual
-                chunk_size = min(bytes_to_write, space_in_block)
-                
-                chunk = record_bytes[record_offset : record_offset + chunk_size]
-                self.current_block.extend(chunk)
-                
-                # Atualiza os contadores para o loop
-                bytes_to_write -= chunk_size
-                record_offset += chunk_size
+            # Calcula o pedaço (chunk) que cabe no bloco atual
+            chunk_size = min(bytes_to_write, block_size - off)
+            block[off : off + chunk_size] = record_view[record_offset : record_offset + chunk_size]
+            off += chunk_size
+
+            # Atualiza os contadores para o loop
+            bytes_to_write -= chunk_size
+            record_offset += chunk_size
+
+        self._off = off
+
+    def write_batch(self, cols: Dict[str, list]):
+        """
+        Escreve todos os alunos recebidos em formato colunar (ver Student.FIELDS).
+        No modo Fixo, os registros são empacotados e distribuídos nos blocos de
+        uma só vez ('pack_fixed_blocks', em Cython quando compilado).
+        Nos modos variáveis, os registros passam pelo mesmo código de
+        'write_record' (ou, em lotes muito grandes, pelo kernel '_pack_blocks').
+        """
+        if self.strategy != 'fixed':
+            self._write_batch_variable(cols)
+            return
+
+        # Bloco menor que o registro fixo: nada pode ser escrito, mas cada aluno
+        # é avisado pelo mesmo código de 'write_record' (que antes tenta empacotá-lo).
+        if _FIXED_SIZE > self.block_size:
+            write = self.write_record_from_fields
+            for row in zip(*(cols[field] for field in Student.FIELDS)):
+                write(*row)
+            return
+
+        try:
+            packed = self._pack_batch_fixed(cols)
+        except _PACK_ERRORS:
+            # Algum aluno não pôde ser empacotado (ex: matrícula fora do 'int').
+            # Como em 'write_record', ele é avisado e descartado, e o resto do lote segue.
+            packed = self._pack_batch_fixed(_drop_unpackable(cols))
+        self._store_batch_fixed(*packed)
+
+    def _pack_batch_fixed(self, cols: Dict[str, list]):
+        """
+        Empacota o lote do modo Fixo sem alterar o simulador, para que uma falha
+        ao empacotar possa ser refeita sem os alunos inválidos.
+        Retorna (n, head, head_data, blocks, useful): os 'head' primeiros
+        registros completam o bloco atual, e 'blocks' traz o restante já em blocos.
+        """
+        n = len(cols['matricula'])
+
+        # Valida os campos numéricos com as mesmas regras do 'struct' ('int' de
+        # 4 bytes e 'float'), pois o NumPy os converteria sem reclamar.
+        array.array('i', cols['matricula'])
+        array.array('i', cols['ano'])
+        array.array('f', cols['ca'])
+
+        # O bloco atual pode já ter registros (de chamadas anteriores):
+        # primeiro completa-o com os registros que ainda cabem nele.
+        head = min((self.block_size - self._off) // _FIXED_SIZE, n) if self._off > 0 else 0
+        head_data = memoryview(pack_fixed_batch(_slice_columns(cols, 0, head))) if head > 0 else b''
+        rest = _slice_columns(cols, head, n) if head > 0 else cols
+        blocks = memoryview(pack_fixed_blocks(rest, self.block_size)) if head < n else None
+        useful = get_variable_size_batch(cols)
+        return n, head, head_data, blocks, useful
+
+    def _store_batch_fixed(self, n: int, head: int, head_data, blocks, useful: int):
+        """Coloca nos blocos (e no arquivo) o lote empacotado por '_pack_batch_fixed'."""
+        if n == 0:
+            return
+        per_block = self.block_size // _FIXED_SIZE
+
+        self.total_useful_data += useful
+        if head > 0:
+            self._block[self._off : self._off + len(head_data)] = head_data
+            self._off += len(head_data)
+        if blocks is None:
+            return
+        self._flush_block()
+        n -= head
+
+        # O restante já vem organizado em blocos. Todos, menos o último, estão
+        # completos e vão direto para o arquivo (depois do que já estava no
+        # buffer de escrita, sem copiá-los para ele) e para as estatísticas.
+        full_blocks = len(blocks) // self.block_size - 1
+        full_bytes = full_blocks * self.block_size
+        self._drain_write_buf()
+        self._write_all(blocks[:full_bytes])
+        self._used.extend([per_block * _FIXED_SIZE] * full_blocks)
+
+        # O último bloco volta a ser o bloco atual em memória
+        last_off = (n - full_blocks * per_block) * _FIXED_SIZE
+        self._block[:last_off] = blocks[full_bytes : full_bytes + last_off]
+        self._off = last_off
+
+    def _write_batch_variable(self, cols: Dict[str, list]):
+        """
+        Modo variável de 'write_batch'. Em lotes muito grandes do modo Com
+        Espalhamento, empacota todos os registros, distribui os bytes nos blocos
+        com '_pack_blocks' (compilado pelo numba) e escreve os blocos completos
+        direto no arquivo; o último bloco (parcial) continua em memória.
+        Nos demais casos, cada registro é escrito com 'write_record_from_fields'.
+        """
+        pack_blocks = None
+        if self.allow_spanning and len(cols['matricula']) >= _NUMBA_MIN_RECORDS:
+            pack_blocks = _jit_pack_blocks()
+        if pack_blocks is None:
+            write = self.write_record_from_fields
+            for row in zip(*(cols[field] for field in Student.FIELDS)):
+                write(*row)
+            return
+
+        # Registros que falharam ao empacotar vêm como b''
+        packed = [record_bytes for record_bytes in pack_variable_batch(cols) if record_bytes]
+        if not packed:
+            return
+
+        records = np.frombuffer(b''.join(packed), dtype=np.uint8)
+        sizes = np.array([len(r) for r in packed], dtype=np.int32)
+        self.total_useful_data += len(records) # No modo variável, todo o registro é útil
+
+        # 1ª passada: só conta os blocos, para alocar 'out' com o tamanho exato
+        empty = np.empty(0, dtype=np.uint8)
+        full_blocks, _ = pack_blocks(records, sizes, empty, np.empty(0, dtype=np.int32),
+                                     self.block_size, self._off, False)
+
+        # 2ª passada: copia os registros, partindo do conteúdo do bloco atual
+        out = np.zeros((full_blocks + 1) * self.block_size, dtype=np.uint8)
+        out[:self._off] = np.frombuffer(self._block, dtype=np.uint8, count=self._off)
+        used = np.empty(full_blocks, dtype=np.int32)
+        full_blocks, off = pack_blocks(records, sizes, out, used, self.block_size, self._off, True)
+
+        # Blocos completos vão direto para o arquivo e as estatísticas
+        full_bytes = full_blocks * self.block_size
+        self._drain_write_buf()
+        self._write_all(out[:full_bytes])
+        self._used.frombytes(used.tobytes())
+
+        # O último bloco volta a ser o bloco atual em memória
+        self._block[:off] = memoryview(out)[full_bytes : full_bytes + off]
+        self._off = off
 
     # ==============================================================================
     # --- SEÇÃO DE ESTATÍSTICAS E RELATÓRIO ---
     # ==============================================================================
 
-    def _generate_chart(self, block_percentages: List[float]):
+    def _generate_chart(self, block_percentages: np.ndarray):
         """Gera um gráfico de barras da ocupação dos blocos."""
-        if not MATPLOTLIB_AVAILABLE:
+        # Tenta importar o matplotlib para o gráfico opcional.
+        # A importação fica aqui (e não no topo do módulo) porque é lenta,
+        # e só é necessária quando o gráfico é realmente gerado.
+        try:
+            import matplotlib.pyplot as plt
+        except ImportError:
             print("\n(Biblioteca 'matplotlib' não encontrada. Pulando geração do gráfico.)")
             print("(Para instalar, rode: pip install matplotlib)")
             return
@@ -265,28 +746,31 @@ class StorageSimulator:
 
     def print_report(self):
         """Calcula e exibe as estatísticas finais e gera o gráfico."""
-        if not self.block_stats:
+        if not self._used:
             print("Nenhum dado foi escrito.")
             return
 
+        # Visão NumPy (sem cópia) dos bytes usados por bloco
+        used = np.frombuffer(self._used, dtype=np.int32)
+
         print("\n" + "="*30)
         print("📊 Relatório de Armazenamento")
         print("="*30)
 
         # --- 1. Número total de blocos utilizados ---
-        total_blocks = len(self.block_stats) 
+        total_blocks = len(used) 
         
         # Dados para os próximos cálculos
-        total_used_bytes = sum(b['used'] for b in self.block_stats)
+        total_used_bytes = int(used.sum())
         total_capacity_bytes = total_blocks * self.block_size
         
         # --- 2. Percentual médio de ocupação de cada bloco ---
-        block_percentages = [(b['used'] / b['total']) * 100 for b in self.block_stats]
-        avg_occupancy = sum(block_percentages) / total_blocks 
+        block_percentages = used / self.block_size * 100
+        avg_occupancy = total_used_bytes / total_capacity_bytes * 100 
         
         # --- 3. Número de blocos parcialmente utilizados ---
         # (Conta blocos que não estão 100% cheios, mas que também não estão vazios)
-        partial_blocks = sum(1 for b in self.block_stats if b['used'] < b['total'] and b['used'] > 0) 
+        partial_blocks = int(np.count_nonzero((used > 0) & (used < self.block_size))) 
         
         # --- 4. Eficiência de armazenamento (% de bytes úteis) ---
         # (Compara o total de dados "reais" com a capacidade total alocada)
@@ -301,9 +785,9 @@ class StorageSimulator:
         # --- Exibição do Mapa Textual --- 
         print("\n--- Mapa de Ocupação dos Blocos ---") 
         # Mostra apenas os 10 primeiros para não poluir o console
-        for i, stats in enumerate(self.block_stats[:10]):
-            percent_full = (stats['used'] / stats['total']) * 100
-            print(f"Bloco {i+1}: {stats['used']} bytes usados / {stats['total']} bytes ( {percent_full:.2f}% cheio )")
+        for i, used_bytes in enumerate(self._used[:10]):
+            percent_full = (used_bytes / self.block_size) * 100
+            print(f"Bloco {i+1}: {used_bytes} bytes usados / {self.block_size} bytes ( {percent_full:.2f}% cheio )")
         if total_blocks > 10:
             print(f"(... e mais {total_blocks - 10} blocos)")
 
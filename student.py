@@ -27,4 +27,10 @@ class Student:
     MAX_CURSO = 30
     MAX_MAE = 30
     MAX_PAI = 30
-    CPF_LEN = 11
\ No newline at end of file
+    CPF_LEN = 11
+
+    # --- Formato Colunar ---
+    # Ordem dos campos usada quando os alunos são representados em colunas
+    # (um dicionário com uma lista por campo, ex: cols['nome'][i]),
+    # evitando criar um objeto Student para cada registro.
+    FIELDS = ('matricula', 'nome', 'cpf', 'curso', 'mae', 'pai', 'ano', 'ca')
\ No newline at end of file
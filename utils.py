@@ -1,28 +1,125 @@
 # utils.py
-from faker import Faker
-from typing import List
+from faker import Generator
+from faker.providers.person.pt_BR import Provider as PersonProvider
+from faker.providers.ssn.pt_BR import Provider as SsnProvider
+from faker.providers.job.pt_BR import Provider as JobProvider
+from itertools import chain, islice
+from multiprocessing import Pool, cpu_count
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
 from student import Student
+from simulator import StorageSimulator
 
-# Inicializa o gerador de dados fictícios.
-# 'pt_BR' garante que nomes e CPFs sejam gerados no formato brasileiro.
-fake = Faker('pt_BR')
+# Semente fixa: a mesma execução sempre gera os mesmos alunos (reprodutível)
+SEED = 0
 
-def generate_students(n: int) -> List[Student]:
-    """Gera uma lista de n registros de alunos fictícios."""
+# Inicializa o gerador de dados fictícios apenas com os provedores usados
+# (nomes, CPF e profissões), em vez de carregar todos os do Faker('pt_BR').
+# Os provedores 'pt_BR' garantem que nomes e CPFs sejam no formato brasileiro.
+fake = Generator()
+fake.add_provider(PersonProvider)
+fake.add_provider(SsnProvider)
+fake.add_provider(JobProvider)
+fake.seed_instance(SEED)
+
+# Lista de cursos (profissões do Faker) já limitada ao tamanho do campo,
+# sorteada direto, sem passar pelo 'fake.job()' a cada aluno.
+CURSOS = [job[:Student.MAX_CURSO] for job in JobProvider.jobs] # Limita o tamanho para ser mais realista
+
+# Número de alunos gerados por pedaço (ver '_chunks')
+CHUNK_SIZE = 10000
+
+# Faixa das matrículas (9 dígitos)
+MATRICULA_MIN = 100000000
+MATRICULA_MAX = 999999999
+
+def iter_matriculas(n: int) -> Iterator[int]:
+    """
+    Gera, sob demanda, n matrículas distintas de 9 dígitos.
+    As matrículas são sorteadas pelo NumPy em lotes, descartando as repetidas;
+    só o conjunto das matrículas já geradas fica em memória.
+    """
+    if n > MATRICULA_MAX - MATRICULA_MIN + 1:
+        raise ValueError(f"Não existem {n} matrículas distintas de 9 dígitos.")
+
+    # Gerador próprio com a semente fixa: toda chamada sorteia a mesma sequência
+    rng = np.random.default_rng(SEED)
+    seen = set()
+    while len(seen) < n:
+        for matricula in rng.integers(MATRICULA_MIN, MATRICULA_MAX + 1, size=CHUNK_SIZE).tolist():
+            if matricula not in seen:
+                seen.add(matricula)
+                yield matricula
+                if len(seen) == n:
+                    return
+
+def generate_matriculas(n: int) -> List[int]:
+    """
+    Gera n matrículas distintas de 9 dígitos (ver 'iter_matriculas').
+    Substitui o 'fake.unique', que sorteia uma a uma com o Faker.
+    """
+    return list(iter_matriculas(n))
+
+def _generate_chunk(chunk: Tuple[int, int]) -> Dict[str, list]:
+    """
+    Gera os campos (exceto a matrícula) de um pedaço com k alunos, usando
+    uma semente própria. Roda em um processo separado quando em paralelo.
+    """
+    k, seed = chunk
+    fake.seed_instance(seed)
+
+    # Gera dados fictícios para cada campo do modelo Student, coluna a coluna
+    return {
+        'nome': [fake.name() for _ in range(k)],
+        'cpf': [fake.cpf().replace('.', '').replace('-', '') for _ in range(k)], # Remove formatação do CPF
+        'curso': fake.random.choices(CURSOS, k=k),
+        'mae': [fake.name() for _ in range(k)],
+        'pai': [fake.name() for _ in range(k)],
+        'ano': [fake.random_int(min=2015, max=2024) for _ in range(k)],
+        'ca': [round(fake.random_int(min=500, max=1000) / 100, 2) for _ in range(k)] # Coeficiente entre 5.0 e 10.0
+    }
+
+def _chunks(n: int) -> List[Tuple[int, int]]:
+    """
+    Divide a geração de n alunos em pedaços de tamanho fixo, cada um com sua
+    semente: (número de alunos, semente). Cada aluno é independente dos
+    demais, e os pedaços não dependem do número de processos, então o
+    resultado é o mesmo em série, em paralelo ou em fluxo.
+    """
+    return [(min(CHUNK_SIZE, n - start), SEED + 1 + i)
+            for i, start in enumerate(range(0, n, CHUNK_SIZE))]
+
+def generate_students(n: int) -> Dict[str, list]:
+    """
+    Gera n registros de alunos fictícios em formato colunar:
+    um dicionário com uma lista por campo do modelo Student (ver Student.FIELDS).
+    """
     
-    students = []
-    for _ in range(n):
-        students.append(
-            Student(
-                # Gera dados fictícios para cada campo do modelo Student
-                matricula=fake.unique.random_int(min=100000000, max=999999999),
-                nome=fake.name(),
-                cpf=fake.cpf().replace('.', '').replace('-', ''), # Remove formatação do CPF
-                curso=fake.job()[:Student.MAX_CURSO], # Limita o tamanho para ser mais realista
-                mae=fake.name(),
-                pai=fake.name(),
-                ano=fake.random_int(min=2015, max=2024),
-                ca=round(fake.random_int(min=500, max=1000) / 100, 2) # Coeficiente entre 5.0 e 10.0
-            )
-        )
-    return students
\ No newline at end of file
+    chunks = _chunks(n)
+    processes = min(cpu_count(), len(chunks))
+    if processes > 1:
+        with Pool(processes) as pool:
+            parts = pool.map(_generate_chunk, chunks)
+    else:
+        parts = [_generate_chunk(chunk) for chunk in chunks]
+
+    # As matrículas precisam ser distintas entre todos os alunos,
+    # então são sorteadas de uma vez aqui, e não em cada pedaço.
+    cols = {'matricula': generate_matriculas(n)}
+    for field in Student.FIELDS[1:]:
+        cols[field] = list(chain.from_iterable(part[field] for part in parts))
+    return cols
+
+def stream_students_to_sim(n: int, sim: StorageSimulator) -> None:
+    """
+    Gera os mesmos n alunos de 'generate_students' e os escreve no simulador
+    pedaço a pedaço, sem criar objetos Student. Só um pedaço (CHUNK_SIZE
+    alunos) fica em memória por vez, além do conjunto das matrículas já
+    usadas; em troca, a geração é feita em série, em um só processo.
+    """
+    matriculas = iter_matriculas(n)
+    write = sim.write_record_from_fields
+    for k, seed in _chunks(n):
+        part = _generate_chunk((k, seed))
+        for row in zip(islice(matriculas, k), *(part[field] for field in Student.FIELDS[1:])):
+            write(*row)